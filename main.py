@@ -9,46 +9,184 @@ __author__ = "André Lopes"
 __version__ = "1.0"
 __license__ = "MIT"
 
-from requests.exceptions import HTTPError
+import asyncio
+import tempfile
+
+from httpx import HTTPError
 from superhero_client import SuperHeroClient
 from superhero import SuperHero
 from pdf import PDF
 
 
-def main():
-    """ Main entry point of the app """
-    client = SuperHeroClient()
-    super_heroes = []
-    hero_id = 0
-    while (len(super_heroes) < 10):
-        hero_id += 1
-        try:
-            # get biography to check publisher
-            biography = client.get_biography(hero_id)
+# Number of pictures downloaded concurrently
+PICTURE_WORKERS = 8
+
+# Hero ids probed concurrently, up to the highest id served by the API,
+# when the bulk endpoint is not available
+BATCH_SIZE = 50
+MAX_HERO_ID = 731
+
+
+def _is_dc_comics(biography):
+    """Returns if the biography belongs to a DC Comics hero
+
+    Parameters
+    ----------
+    biography : dict
+        the biography of the super hero
+
+    Returns
+    -------
+    bool
+        If the hero is published by DC Comics
+    """
+    return bool(biography) and (
+        (biography['publisher'] or '').lower() == 'DC Comics'.lower()
+    )
+
+
+async def _fetch(request):
+    """Await an API request, printing HTTP errors instead of raising them"""
+    try:
+        return await request
+    except HTTPError as err:
+        print(err)
+
+
+async def _probe_heroes(client, count):
+    """Probe hero ids in batches until enough DC Comics heroes are found
+
+    Stops at the first batch that completes the count and never goes past
+    MAX_HERO_ID, so the number of requests is bounded.
+
+    Parameters
+    ----------
+    client : SuperHeroClient
+        the client used to query the API
+    count : int
+        the number of super heroes to collect
+
+    Returns
+    -------
+    list
+        raw information of the DC Comics super heroes found
+    """
+    heroes = []
+    for start in range(1, MAX_HERO_ID + 1, BATCH_SIZE):
+        hero_ids = range(start, min(start + BATCH_SIZE, MAX_HERO_ID + 1))
+
+        # get all information at once and check publisher from it
+        batch = await asyncio.gather(
+            *[_fetch(client.get_super_hero(i)) for i in hero_ids]
+        )
+        heroes.extend(
+            hero for hero in batch
+            if isinstance(hero, dict) and _is_dc_comics(hero['biography'])
+        )
 
-            # check biography response
-            if (not biography):
-                continue
+        if len(heroes) >= count:
+            break
 
-            if (biography['publisher'].lower() == 'DC Comics'.lower()):
-                # get all information once publisher is right
-                hero = client.get_super_hero(hero_id)
+    return heroes[:count]
 
-                # check hero response
-                if (not hero):
-                    continue
 
-                super_hero = SuperHero.from_api(hero)
-                super_heroes.append(super_hero)
+async def _download_pictures(client, queue, directory, paths):
+    """Download the pictures put on the queue
 
+    Parameters
+    ----------
+    client : SuperHeroClient
+        the client used to download the pictures
+    queue : Queue
+        the urls of the pictures to download, None to stop
+    directory : str
+        directory where the pictures are written to
+    paths : dict
+        local path of each downloaded picture by url, filled in place
+    """
+    while True:
+        picture = await queue.get()
+        if picture is None:
+            return
+
+        try:
+            paths[picture] = await client.get_picture(picture, directory)
         except HTTPError as err:
+            # reportlab falls back to fetching the url itself
             print(err)
 
-    PDF(
-        'super_heroes',
-        'The Super Heroes API - DC Comics',
-        super_heroes
-    ).create_pdf()
+
+async def get_super_heroes(directory, count=10):
+    """Collect the first DC Comics super heroes from the API
+
+    Pictures are downloaded as soon as each hero is found, while the
+    remaining heroes are still being filtered. Hero ids are probed in
+    batches when the bulk endpoint is not available.
+
+    Parameters
+    ----------
+    directory : str
+        directory where the pictures are written to
+    count : int, optional
+        the number of super heroes to collect
+
+    Returns
+    -------
+    list
+        the super heroes list
+    """
+    super_heroes = []
+    async with SuperHeroClient() as client:
+        # get every hero at once and filter publisher locally
+        all_heroes = await _fetch(client.get_all())
+        if not isinstance(all_heroes, list) or not all_heroes:
+            all_heroes = await _probe_heroes(client, count)
+
+        queue = asyncio.Queue()
+        # each picture url is downloaded once, shared heroes reuse its path
+        pictures = set()
+        paths = {}
+        workers = [
+            asyncio.create_task(
+                _download_pictures(client, queue, directory, paths)
+            )
+            for _ in range(PICTURE_WORKERS)
+        ]
+
+        try:
+            for hero in all_heroes:
+                if len(super_heroes) == count:
+                    break
+
+                if _is_dc_comics(hero['biography']):
+                    super_hero = SuperHero.from_api(hero)
+                    super_heroes.append(super_hero)
+                    if super_hero.picture not in pictures:
+                        pictures.add(super_hero.picture)
+                        queue.put_nowait(super_hero.picture)
+                        # let the workers start the download right away
+                        await asyncio.sleep(0)
+        finally:
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+
+        for super_hero in super_heroes:
+            super_hero.local_picture = paths.get(super_hero.picture)
+
+    return super_heroes
+
+
+def main():
+    """ Main entry point of the app """
+    with tempfile.TemporaryDirectory() as picture_dir:
+        super_heroes = asyncio.run(get_super_heroes(picture_dir))
+
+        PDF(
+            'super_heroes',
+            'The Super Heroes API - DC Comics',
+            super_heroes
+        ).create_pdf()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,11 @@
+import io
+import os
+
+from collections import defaultdict
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.units import inch
-from reportlab.platypus import Paragraph
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Frame, Paragraph
 from reportlab.lib.styles import ParagraphStyle
 
 
@@ -32,7 +37,7 @@ class PDF:
         super_heroes : list
             the super heroes list
         """
-        self.data = {}
+        self.data = defaultdict(list)
         self.file_name = file_name
         self.title = title
 
@@ -40,8 +45,17 @@ class PDF:
         self._bottom = 11 * inch
         self._page_items = 0
         self._font = 'Helvetica'
+        self._msg_style = ParagraphStyle(
+            'hero_body',
+            fontName=self._font,
+            fontSize=10,
+            leading=12,
+            spaceAfter=12
+        )
         self._right_info = 2*inch + inch/2
         self._right_image = inch
+        self._img_cache = {}
+        self._paragraph_cache = {}
 
     def _prepare_data(self, super_heroes):
         """Prepare data from the api to be used in the PDF output
@@ -53,43 +67,39 @@ class PDF:
         """
         for super_hero in super_heroes:
             group = super_hero.occupation[0].lower().capitalize()
-            if group not in self.data:
-                self.data.update({group: [super_hero]})
-            else:
-                self.data[group].append(super_hero)
-
-    def _draw_paragraph(
-        self,
-        msg,
-        x,
-        y,
-        max_width=5*inch,
-        max_height=11*inch
-    ):
-        """Draw a paragraph on PDF canvas
+            self.data[group].append(super_hero)
+
+    def _image(self, source):
+        """Get the image to draw for a picture, decoding each source once
+
+        Local JPEG files are drawn from their path so reportlab embeds
+        them byte-for-byte as DCTDecode streams instead of decoding and
+        re-encoding them.
 
         Parameters
         ----------
-        msg : str
-            message to be written
-        x : int
-            position in the x axis from the left of the page
-        y : int
-            position in the y axis from the bottom of the page
-        max_width : int, optional
-            max width of the paragraph
-        max_height : int, optional
-            max height of the paragraph
+        source : str
+            path or url of the picture
+
+        Returns
+        -------
+        str, ImageReader
+            the JPEG path or the cached image reader of the picture
         """
-        message_style = ParagraphStyle('Normal')
-        message = Paragraph(msg, style=message_style)
-        _, h = message.wrap(max_width, max_height)
-        y -= h
-        message.drawOn(self.canvas, x, y)
-        self._bottom = self._bottom - h - 12
+        if source not in self._img_cache:
+            ext = os.path.splitext(source)[1].lower()
+            if ext in ('.jpg', '.jpeg') and os.path.isfile(source):
+                self._img_cache[source] = source
+            else:
+                self._img_cache[source] = ImageReader(source)
+        return self._img_cache[source]
 
-    def _draw_info_paragraph(self, title, msg):
-        """Draw hero paragraph information on pdf canvas
+    def _info_paragraph(self, title, msg):
+        """Build hero paragraph information, parsing each one once
+
+        Repeated information (e.g. unknown place of birth) reuses the
+        same paragraph, which is safe as the frame wraps it again right
+        before drawing it.
 
         Parameters
         ----------
@@ -97,14 +107,52 @@ class PDF:
             the title of the super hero information
         msg : str
             message to be written
+
+        Returns
+        -------
+        Paragraph
+            the paragraph with the super hero information
+        """
+        key = (title, msg)
+        if key not in self._paragraph_cache:
+            message = msg.replace('\n', '<br />')
+            self._paragraph_cache[key] = Paragraph(
+                f'<b>{title}:</b> {message}',
+                style=self._msg_style
+            )
+        return self._paragraph_cache[key]
+
+    def _draw_info(self, hero, max_width=5*inch):
+        """Draw all hero information in a single frame on pdf canvas
+
+        The frame lays out every paragraph in one pass, starting at the
+        current bottom of the canvas.
+
+        Parameters
+        ----------
+        hero : SuperHero
+            the super hero to be written
+        max_width : int, optional
+            max width of the information
         """
-        message = msg.replace('\n', '<br />')
-        message = '<b>{}:</b> {}'.format(title, message)
-        self._draw_paragraph(
-            message,
+        fields = (
+            ('Full name', hero.full_name),
+            ('Alter Egos', self._print_list(hero.alter_egos)),
+            ('Aliases', self._print_list(hero.aliases)),
+            ('Place of Birth', hero.place_of_birth),
+        )
+        flowables = [self._info_paragraph(*field) for field in fields]
+        frame = Frame(
             self._right_info,
-            self._bottom
+            0,
+            max_width,
+            self._bottom,
+            leftPadding=0,
+            bottomPadding=0,
+            rightPadding=0,
+            topPadding=0
         )
+        frame.addFromList(flowables, self.canvas)
 
     def _draw_heading(self, msg, font_size):
         """Draw heading on canvas
@@ -155,58 +203,52 @@ class PDF:
 
     def create_pdf(self):
         """Create the super heroes PDF from information provided"""
-        self.canvas = Canvas(self.file_name + '.pdf')
+        # Render in memory and write the file to disk in one go
+        buffer = io.BytesIO()
+        self.canvas = Canvas(buffer)
         self._draw_heading(self.title, 18)
 
+        half_inch = inch/2
+        quarter_inch = inch/4
+        image_width = 480/5
+        image_height = 640/5
+
         for key in self.data:
-            self._right_info = 2*inch + inch/2
+            shared = self._shared_occupation(key)
+            self._right_info = 2*inch + half_inch
             self._right_image = inch
 
-            if (self._shared_occupation(key)):
-                self._right_info += inch/2
-                self._right_image += inch/2
+            if (shared):
+                self._right_info += half_inch
+                self._right_image += half_inch
                 self._draw_heading(key, 16)
                 self._page_items += 1
 
             heroes = self.data[key]
-            for hero in heroes:
+            last = len(heroes) - 1
+            for i, hero in enumerate(heroes):
                 self._page_items += 1
 
-                image_bottom = self._bottom - 640/5
+                image_bottom = self._bottom - image_height
                 self.canvas.setFont(self._font, 11)
                 self.canvas.drawImage(
-                    hero.picture,
+                    self._image(hero.local_picture or hero.picture),
                     self._right_image,
                     image_bottom + 20,
-                    width=480/5,
-                    height=640/5
+                    width=image_width,
+                    height=image_height
                 )
 
-                self._draw_info_paragraph(
-                    'Full name',
-                    hero.full_name,
-                )
-                self._draw_info_paragraph(
-                    'Alter Egos',
-                    self._print_list(hero.alter_egos),
-                )
-                self._draw_info_paragraph(
-                    'Aliases',
-                    self._print_list(hero.aliases),
-                )
-                self._draw_info_paragraph(
-                    'Place of Birth',
-                    hero.place_of_birth,
-                )
+                self._draw_info(hero)
 
                 self._bottom = image_bottom
 
-                if (self._shared_occupation(key) and hero == heroes[-1]):
+                if (shared and i == last):
                     self.canvas.drawString(
                         inch, self._bottom, '_'*80)
-                    self._bottom -= inch/4
+                    self._bottom -= quarter_inch
 
-                self._bottom -= inch/4
+                self._bottom -= quarter_inch
 
                 if self._page_items == 5:
                     # Reset bottom and create new page on PDF
@@ -215,4 +257,6 @@ class PDF:
                     self._bottom = 11 * inch
 
         self.canvas.save()
+        with open(self.file_name + '.pdf', 'wb') as f:
+            f.write(buffer.getbuffer())
         print("Created Superheroes PDF '{}.pdf'".format(self.file_name))
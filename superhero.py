@@ -18,6 +18,8 @@ class SuperHero:
         the place of birth of the super hero
     picture : str
         url that point to a picture of the super hero
+    local_picture : str
+        path to a downloaded copy of the picture, if any
 
     Methods
     -------
@@ -55,6 +57,7 @@ class SuperHero:
         self.place_of_birth = place_of_birth
         self.picture = picture
         self.occupation = occupation
+        self.local_picture = None
 
     @classmethod
     def from_api(cls, hero):
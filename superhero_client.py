@@ -1,14 +1,41 @@
 #!/usr/bin/env python
 
-import requests
+import asyncio
+import httpx
 import logging
+import orjson
 import os
 import sys
+import tempfile
 
-from requests.adapters import HTTPAdapter, Retry
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from diskcache import Cache
 
 base_url = 'https://akabab.github.io/superhero-api/api'
-headers = {'Content-Type': 'application/json'}
+headers = {
+    'Content-Type': 'application/json',
+    # httpx decodes brotli transparently when the Brotli package is installed
+    'Accept-Encoding': 'gzip, br',
+}
+
+# Max number of requests in flight at the same time
+max_concurrency = 64
+# Seconds an idle connection is kept open for reuse
+keepalive_timeout = 30
+# Seconds to wait for the host before giving up on a request
+request_timeout = 10.0
+
+# Retry policy for transient errors, 404s are never retried. Failed
+# connection attempts are retried by the transport itself.
+retry_total = 3
+retry_backoff_factor = 0.2
+retry_status_forcelist = (502, 503, 504)
+retry_allowed_methods = frozenset(['GET'])
+
+# On-disk cache for API responses, which never change
+cache_dir = '.superhero_cache'
+cache_expire = 30 * 24 * 60 * 60
 
 # Set up basic logger
 logger = logging.getLogger('superhero.client')
@@ -34,34 +61,111 @@ except ValueError:
 class SuperHeroClient(object):
     """A Class to handle the client of the superhero-api
 
+    Must be used as an async context manager so the underlying session
+    is opened and closed inside the running event loop.
+
     Attributes
     ----------
     base_url : str
         the base url from the api
-    session : Session
-        the current request session
+    session : AsyncClient
+        the current httpx client
 
     Methods
     -------
-    from_api(hero)
-        Initialize super hero from API object
+    make_request(route, method, params, body)
+        Make Request for the API with a route, params and body if needed
+    get_biography(hero_id)
+        Make Request to get biography of a specific super hero
+    get_super_hero(hero_id)
+        Make Request to get all information of a specific super hero
+    get_all()
+        Make Request to get all information of every super hero
+    get_picture(url, directory)
+        Download a super hero picture into a temporary file
     """
     def __init__(self):
         """Set up client for API communications"""
         # Setup Host here
         self.base_url = base_url
-        # Setup Session object for all future API calls
-        self.session = requests.Session()
+        # Session is created once the event loop is running
+        self.session = None
+        # Bound the number of concurrent requests to the host
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Responses are cached on disk between runs
+        self._cache = Cache(cache_dir)
+
+    async def __aenter__(self):
+        """Open the httpx client for all future API calls"""
+        # Requests are multiplexed over a single HTTP/2 connection so
+        # the TLS handshake is paid once
+        limits = httpx.Limits(
+            max_connections=max_concurrency,
+            keepalive_expiry=keepalive_timeout
+        )
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=limits,
+            retries=retry_total
+        )
+        self.session = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=request_timeout,
+            transport=transport
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Close the httpx client and the response cache"""
+        await self.session.aclose()
+        self.session = None
+        self._cache.close()
+
+    async def _make_request(self, route, method, params=None, body=None):
+        """Handles all requests to the Super Hero API
 
-        retries = Retry(total=5, backoff_factor=1,
-                        status_forcelist=[502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        GET responses are served from the on-disk cache when present.
+        Only parsed JSON is cached, never the text of a non-JSON body.
 
-        if headers:
-            self.session.headers.update(headers)
+        Parameters
+        ----------
+        route : str
+            the api route
+        method : str
+            the method of request
+        params : dict
+            params to send in the request call
+        body : dict
+            message body to be sent in the request call
 
-    def _make_request(self, route, method, params=None, body=None):
-        """Handles all requests to the Super Hero API
+        Raises
+        ------
+        HTTPStatusError
+            Raises HTTP error if response status code is 4XX or 5XX
+
+        Returns
+        -------
+        dict
+            Super Hero information
+        """
+        if method != 'GET':
+            return await self._send_request(route, method, params, body)
+
+        url = self.base_url + route
+        key = (method, url, tuple(sorted((params or {}).items())))
+        res = self._cache.get(key)
+        if res is not None:
+            logger.debug('%s served from cache', route)
+            return res
+
+        res = await self._send_request(route, method, params, body)
+        if isinstance(res, (dict, list)):
+            self._cache.set(key, res, expire=cache_expire)
+        return res
+
+    async def _send_request(self, route, method, params=None, body=None):
+        """Send a request to the Super Hero API, retrying transient errors
 
         Parameters
         ----------
@@ -76,7 +180,7 @@ class SuperHeroClient(object):
 
         Raises
         ------
-        HTTPError
+        HTTPStatusError
             Raises HTTP error if response status code is 4XX or 5XX
 
         Returns
@@ -84,34 +188,101 @@ class SuperHeroClient(object):
         dict
             Super Hero information
         """
-        url = self.base_url + route
-        req = requests.Request(method, url, params=params, json=body)
-        prepped = self.session.prepare_request(req)
+        retries = retry_total if method in retry_allowed_methods else 0
+        delay = 0
+
+        for retry in range(retries + 1):
+            if retry:
+                await asyncio.sleep(delay)
+            delay = retry_backoff_factor * 2 ** retry
+
+            async with self._semaphore:
+                # Make request to endpoint
+                r = await self.session.request(
+                    method, route, params=params, json=body
+                )
 
-        # Make request to endpoint
-        r = self.session.send(prepped)
+            if r.status_code in retry_status_forcelist and retry < retries:
+                delay = self._retry_after(r, delay)
+                continue
+            return self._handle_response(route, r)
 
-        if r.status_code == requests.codes.ok:
+    @staticmethod
+    def _retry_after(r, default):
+        """Seconds to wait before retrying, honoring the Retry-After header
+
+        Parameters
+        ----------
+        r : Response
+            the response of the request
+        default : float
+            the backoff delay to use if the header is missing or invalid
+
+        Returns
+        -------
+        float
+            seconds to wait before the next attempt
+        """
+        value = r.headers.get('Retry-After')
+        if value is None:
+            return default
+
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max((date - datetime.now(timezone.utc)).total_seconds(), 0)
+
+    def _handle_response(self, route, r):
+        """Handles the response of a request to the Super Hero API
+
+        Parameters
+        ----------
+        route : str
+            the api route
+        r : Response
+            the response of the request
+
+        Raises
+        ------
+        HTTPStatusError
+            Raises HTTP error if response status code is 4XX or 5XX
+
+        Returns
+        -------
+        dict
+            Super Hero information
+        """
+        if r.status_code == httpx.codes.OK:
             try:
-                res_json = r.json()
-                logger.debug('Response: {}'.format(res_json))
+                res_json = orjson.loads(r.content)
+                logger.debug('Response: %s', res_json)
                 return res_json
-            except ValueError:
+            except orjson.JSONDecodeError:
                 return r.text
 
         elif r.status_code == 404:
-            logger.debug('{} not found!'.format(route))
+            logger.debug('%s not found!', route)
 
         # Raises HTTP error if status_code is 4XX or 5XX
         elif r.status_code >= 400:
-            logger.error('Received a ' + str(r.status_code) + ' error!')
-            try:
-                logger.debug('Details: ' + str(r.json()))
-            except ValueError:
-                pass
+            logger.error('Received a %s error!', r.status_code)
+            # Only read and parse the error body if it will be logged
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    logger.debug('Details: %s', orjson.loads(r.content))
+                except orjson.JSONDecodeError:
+                    pass
             r.raise_for_status()
 
-    def make_request(
+    async def make_request(
         self,
         route,
         method='GET',
@@ -133,7 +304,7 @@ class SuperHeroClient(object):
 
         Raises
         ------
-        HTTPError
+        HTTPStatusError
             Raises HTTP error if response status code is 4XX or 5XX
 
         Returns
@@ -141,9 +312,9 @@ class SuperHeroClient(object):
         dict
             Super Hero information
         """
-        return self._make_request(route, method, params, body)
+        return await self._make_request(route, method, params, body)
 
-    def get_biography(self, hero_id):
+    async def get_biography(self, hero_id):
         """Make Request to get biography of a specific super hero
 
         Parameters
@@ -153,7 +324,7 @@ class SuperHeroClient(object):
 
         Raises
         ------
-        HTTPError
+        HTTPStatusError
             Raises HTTP error if response status code is 4XX or 5XX
 
         Returns
@@ -162,10 +333,10 @@ class SuperHeroClient(object):
             Super Hero information
         """
         route = '/biography/{}.json'.format(hero_id)
-        res = self._make_request(route, 'GET')
+        res = await self._make_request(route, 'GET')
         return res
 
-    def get_super_hero(self, hero_id):
+    async def get_super_hero(self, hero_id):
         """Make Request to get all information of a specific super hero
 
         Parameters
@@ -175,7 +346,7 @@ class SuperHeroClient(object):
 
         Raises
         ------
-        HTTPError
+        HTTPStatusError
             Raises HTTP error if response status code is 4XX or 5XX
 
         Returns
@@ -184,4 +355,55 @@ class SuperHeroClient(object):
             Super Hero information
         """
         endpoint = '/id/{}.json'.format(hero_id)
-        return self._make_request(endpoint, 'GET')
+        return await self._make_request(endpoint, 'GET')
+
+    async def get_all(self):
+        """Make Request to get all information of every super hero
+
+        Raises
+        ------
+        HTTPStatusError
+            Raises HTTP error if response status code is 4XX or 5XX
+
+        Returns
+        -------
+        list
+            Super Heroes information
+        """
+        endpoint = '/all.json'
+        return await self._make_request(endpoint, 'GET')
+
+    async def get_picture(self, url, directory):
+        """Download a super hero picture into a temporary file
+
+        Parameters
+        ----------
+        url : str
+            url of the picture
+        directory : str
+            directory where the picture is written to
+
+        Raises
+        ------
+        HTTPError
+            Raises HTTP error if the picture could not be downloaded
+
+        Returns
+        -------
+        str
+            path of the downloaded picture
+        """
+        async with self._semaphore:
+            r = await self.session.get(url)
+        r.raise_for_status()
+
+        # Name JPEGs by their content so they can be embedded as is
+        if r.content.startswith(b'\xff\xd8\xff'):
+            suffix = '.jpg'
+        else:
+            suffix = os.path.splitext(url)[1]
+        with tempfile.NamedTemporaryFile(
+            dir=directory, suffix=suffix, delete=False
+        ) as f:
+            f.write(r.content)
+        return f.name